@@ -5,17 +5,28 @@ A FastAPI backend for generating company leads with web scraping enhancement.
 Author: Senior Backend Engineer
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 import uvicorn
 import os
+import re
+import time
+import hashlib
+import secrets
+import string
+import threading
 from datetime import datetime
 import json
 from enum import Enum
+from functools import partial
 import logging
+import anyio
+import httpx
+import redis.asyncio as redis
 
 # Configure logging for production
 logging.basicConfig(
@@ -28,18 +39,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from generate_health_insurance import GeminiClient
-from web_scraper import scrape_company_data
+from generate_health_insurance import get_client
+from retry_utils import classify
+from openai import APIConnectionError
+from web_scraper import scrape_company_data_async
 from email_sender import get_email_sender
 from business_intelligence import BusinessIntelligenceAnalyzer
 from avatar_service import get_avatar_service
 from context_aware_lead_generator import generate_leads_from_website
 from africastalking_service import get_africastalking_service
 from fastapi.responses import Response
-import base64
+import pybase64
+import orjson
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup/shutdown hooks (defined at the bottom of this module)"""
+    await startup_event()
+    yield
+    await shutdown_event()
+
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Lead Generator API",
     description="AI-powered lead generation with web scraping enhancement",
     version="1.0.0",
@@ -71,40 +94,35 @@ class LeadRequest(BaseModel):
         min_length=2, 
         max_length=100,
         description="Industry to target (e.g., 'health insurance', 'technology', 'finance')",
-        example="health insurance"
+        examples=["health insurance"]
     )
     number: int = Field(
         ..., 
         ge=1, 
         le=50,
         description="Number of companies to generate (1-50)",
-        example=10
+        examples=[10]
     )
     country: str = Field(
         ..., 
         min_length=2, 
         max_length=100,
         description="Country to focus on (e.g., 'USA', 'UK', 'Canada')",
-        example="USA"
+        examples=["USA"]
     )
     enable_web_scraping: bool = Field(
         default=False,
         description="Enable web scraping for enhanced contact data (slower but more accurate)"
     )
     
-    @validator('number')
-    def validate_number(cls, v):
-        if v < 1:
-            raise ValueError('Number must be at least 1')
-        if v > 50:
-            raise ValueError('Number cannot exceed 50 (rate limiting)')
-        return v
-    
-    @validator('industry', 'country')
+    @field_validator('industry', 'country', mode='before')
+    @classmethod
     def validate_non_empty(cls, v):
-        if not v or v.strip() == "":
+        if isinstance(v, str):
+            v = v.strip()
+        if not v:
             raise ValueError('Field cannot be empty')
-        return v.strip()
+        return v
 
 
 class CompanySocialMedia(BaseModel):
@@ -144,6 +162,12 @@ class LeadResponse(BaseModel):
     metadata: Dict[str, Any]
 
 
+class ExportFormat(str, Enum):
+    """Supported export formats"""
+    json = "json"
+    csv = "csv"
+
+
 class HealthCheckResponse(BaseModel):
     """Health check response"""
     status: str
@@ -152,18 +176,130 @@ class HealthCheckResponse(BaseModel):
     gemini_api_configured: bool
 
 
-# ========== In-Memory Storage ==========
-# NOTE: This is in-memory and won't work with multiple workers (Docker uses 4 workers)
-# For production with async endpoints, use Redis or a database
-# Current frontend uses sync endpoint only for reliability
-job_storage = {}
+# Worker threads available for blocking LLM/scraping calls offloaded from the event loop
+THREADPOOL_SIZE = int(os.getenv('THREADPOOL_SIZE', '64'))
+
+
+# ========== Job Storage ==========
+# Jobs are kept in Redis when REDIS_URL is set so every worker sees the same state.
+# Without Redis, jobs fall back to a per-process dict (only safe with a single worker)
+# holding (expires_at, fields) pairs, expired with the same TTLs as in Redis.
+REDIS_URL = os.getenv('REDIS_URL')
+JOB_TTL_SECONDS = 3600
+COMPLETED_JOB_TTL_SECONDS = 86400
+
+redis_client = redis.from_url(REDIS_URL) if REDIS_URL else None
+job_storage: Dict[str, tuple] = {}
+
+
+async def save_job(job_id: str, fields: Dict[str, Any], ttl: int = JOB_TTL_SECONDS):
+    """Create a job or update individual fields of an existing one"""
+    if redis_client is None:
+        now = time.monotonic()
+        for expired_id in [k for k, (expires_at, _) in job_storage.items() if expires_at <= now]:
+            del job_storage[expired_id]
+        
+        _, job = job_storage.get(job_id, (None, {}))
+        job.update(fields)
+        job_storage[job_id] = (now + ttl, job)
+        return
+    
+    key = f"job:{job_id}"
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, ttl)
+        await pipe.execute()
+
+
+async def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch a job by ID, or None if it does not exist (or has expired)"""
+    if redis_client is None:
+        entry = job_storage.get(job_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+    
+    job = await redis_client.hgetall(f"job:{job_id}")
+    if not job:
+        return None
+    # result_bytes is pre-encoded JSON and stays as bytes; everything else is text
+    return {
+        key.decode(): value if key == b'result_bytes' else value.decode()
+        for key, value in job.items()
+    }
+
+
+# Shared HTTP client for web scraping: one bounded keep-alive pool for the whole process
+_scrape_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=10.0,
+    http2=True
+)
+# Concurrent page fetches per scraping run (kept well under the pool size)
+SCRAPE_MAX_CONCURRENCY = 16
+
+
+# ========== LLM Result Cache ==========
+# Gemini results keyed by normalized (industry, number, country). Stored in Redis
+# when available, otherwise in a small per-process dict.
+LEADS_CACHE_TTL_SECONDS = int(os.getenv('LEADS_CACHE_TTL_SECONDS', '3600'))
+LEADS_CACHE_MAX_ENTRIES = 256
+
+_leads_cache: Dict[str, tuple] = {}
+_leads_cache_lock = threading.Lock()
+
+
+def _normalize_query(value: str) -> str:
+    """Fold case and separators so 'Health-Insurance' and 'health insurance' match"""
+    # Only whitespace, '-' and '_' are folded: other punctuation is meaningful ('C++' vs 'C#')
+    return " ".join(re.sub(r'[\s_-]+', ' ', value.lower()).split())
+
+
+def leads_cache_key(industry: str, number: int, country: str) -> str:
+    """Cache key for a lead generation query"""
+    raw = f"{_normalize_query(industry)}|{number}|{_normalize_query(country)}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def get_cached_leads(key: str) -> Optional[Dict]:
+    """Return a cached LLM result, or None. Must be called from a worker thread."""
+    try:
+        if redis_client is not None:
+            cached = anyio.from_thread.run(redis_client.get, f"leads:{key}")
+        else:
+            with _leads_cache_lock:
+                entry = _leads_cache.get(key)
+            cached = entry[1] if entry and entry[0] > time.monotonic() else None
+    except Exception as e:
+        logger.warning(f"Leads cache lookup failed: {str(e)}")
+        return None
+    
+    return orjson.loads(cached) if cached else None
+
+
+def set_cached_leads(key: str, result: Dict):
+    """Store an LLM result in the cache. Must be called from a worker thread."""
+    payload = orjson.dumps(result)
+    try:
+        if redis_client is not None:
+            anyio.from_thread.run(
+                partial(redis_client.set, f"leads:{key}", payload, ex=LEADS_CACHE_TTL_SECONDS)
+            )
+            return
+        
+        with _leads_cache_lock:
+            if key not in _leads_cache and len(_leads_cache) >= LEADS_CACHE_MAX_ENTRIES:
+                _leads_cache.pop(next(iter(_leads_cache)))
+            _leads_cache[key] = (time.monotonic() + LEADS_CACHE_TTL_SECONDS, payload)
+    except Exception as e:
+        logger.warning(f"Leads cache store failed: {str(e)}")
 
 
 # ========== Helper Functions ==========
 
 def validate_api_key():
-    """Validate that GEMINI_API_KEY is configured"""
-    api_key = os.getenv('GEMINI_API_KEY')
+    """Validate that GEMINI_API_KEY is configured (read once at startup)"""
+    api_key = app.state.gemini_api_key
     if not api_key:
         raise HTTPException(
             status_code=500,
@@ -172,50 +308,43 @@ def validate_api_key():
     return True
 
 
-def generate_leads_sync(industry: str, number: int, country: str, enable_scraping: bool = False) -> Dict:
-    """Synchronous lead generation with automatic retry handling"""
+def generate_leads_sync(industry: str, number: int, country: str) -> Dict:
+    """Synchronous AI lead generation with automatic retry handling"""
     try:
         validate_api_key()
         
         # Generate leads with AI (includes automatic retry logic for 503 errors)
         logger.info(f"Starting lead generation: industry={industry}, number={number}, country={country}")
-        client = GeminiClient()
-        result = client.generate_companies(industry, number, country)
+        cache_key = leads_cache_key(industry, number, country)
+        result = get_cached_leads(cache_key)
         
-        # Enhance with web scraping if enabled
-        if enable_scraping:
-            logger.info("Enhancing results with web scraping (parallel)...")
-            result = scrape_company_data_parallel(result, max_workers=3)
+        if result is not None:
+            logger.info("Serving AI leads from cache")
+        else:
+            client = get_client()
+            result = client.generate_companies(industry, number, country)
+            # A partial result (some shards failed) is served but not cached
+            if 'companies' in result and not result.get('failed_shards'):
+                set_cached_leads(cache_key, result)
         
         logger.info(f"Successfully generated {len(result.get('companies', []))} leads")
         return result
         
     except Exception as e:
         error_msg = str(e)
-        error_lower = error_msg.lower()
-        
-        # Check if it's a 503/overload error (after retries exhausted)
-        is_503_error = (
-            '503' in error_msg or 
-            'overloaded' in error_lower or 
-            'unavailable' in error_lower or
-            'model is overloaded' in error_lower or
-            'service unavailable' in error_lower
-        )
         
-        # Check if it's a rate limit error (429)
-        is_rate_limit = (
-            '429' in error_msg or
-            'rate limit' in error_lower or
-            'too many requests' in error_lower
-        )
+        # Classify the underlying API error the generator wrapped (after retries)
+        cause = e.__cause__ or e
+        _, status_code = classify(cause)
         
-        # Check if it's a connection/timeout error
-        is_connection_error = (
-            'connection' in error_lower or
-            'timeout' in error_lower or
-            'network' in error_lower
-        )
+        # 503/overload error, including an open circuit breaker
+        is_503_error = status_code in (500, 502, 503, 504)
+        
+        # Rate limit error (429)
+        is_rate_limit = status_code == 429
+        
+        # Connection/timeout error
+        is_connection_error = isinstance(cause, APIConnectionError)
         
         if is_503_error:
             logger.error(f"503/Service Unavailable error after retries: {error_msg}")
@@ -248,22 +377,45 @@ def generate_leads_sync(industry: str, number: int, country: str, enable_scrapin
             )
 
 
+async def run_lead_generation(industry: str, number: int, country: str, enable_scraping: bool = False) -> Dict:
+    """Generate leads in a worker thread, then optionally enhance them with async web scraping"""
+    result = await anyio.to_thread.run_sync(partial(generate_leads_sync, industry, number, country))
+    
+    # Enhance with web scraping if enabled
+    if enable_scraping:
+        logger.info("Enhancing results with web scraping...")
+        result = await scrape_company_data_async(
+            result,
+            client=_scrape_client,
+            max_concurrency=min(number, SCRAPE_MAX_CONCURRENCY)
+        )
+    
+    return result
+
+
 async def generate_leads_background(job_id: str, industry: str, number: int, country: str, enable_scraping: bool):
     """Background task for lead generation"""
     try:
-        job_storage[job_id]['status'] = 'processing'
-        job_storage[job_id]['started_at'] = datetime.utcnow().isoformat()
+        await save_job(job_id, {
+            'status': 'processing',
+            'started_at': datetime.utcnow().isoformat()
+        })
         
-        result = generate_leads_sync(industry, number, country, enable_scraping)
+        result = await run_lead_generation(industry, number, country, enable_scraping)
         
-        job_storage[job_id]['status'] = 'completed'
-        job_storage[job_id]['completed_at'] = datetime.utcnow().isoformat()
-        job_storage[job_id]['result'] = result
+        # Encode once at completion; status/export polls serve these bytes as-is
+        await save_job(job_id, {
+            'status': 'completed',
+            'completed_at': datetime.utcnow().isoformat(),
+            'result_bytes': orjson.dumps(result)
+        }, ttl=COMPLETED_JOB_TTL_SECONDS)
         
     except Exception as e:
-        job_storage[job_id]['status'] = 'failed'
-        job_storage[job_id]['error'] = str(e)
-        job_storage[job_id]['completed_at'] = datetime.utcnow().isoformat()
+        await save_job(job_id, {
+            'status': 'failed',
+            'error': str(e),
+            'completed_at': datetime.utcnow().isoformat()
+        }, ttl=COMPLETED_JOB_TTL_SECONDS)
 
 
 # ========== API Endpoints ==========
@@ -282,7 +434,7 @@ async def root():
 @app.get("/health", response_model=HealthCheckResponse, tags=["Health"])
 async def health_check():
     """Health check endpoint"""
-    api_key_configured = bool(os.getenv('GEMINI_API_KEY'))
+    api_key_configured = bool(app.state.gemini_api_key)
     
     return {
         "status": "healthy",
@@ -309,7 +461,7 @@ async def generate_leads(request: LeadRequest):
     """
     try:
         # Generate leads
-        result = generate_leads_sync(
+        result = await run_lead_generation(
             industry=request.industry,
             number=request.number,
             country=request.country,
@@ -331,7 +483,7 @@ async def generate_leads(request: LeadRequest):
             }
         }
         
-        return response
+        return Response(content=orjson.dumps(response), media_type="application/json")
         
     except HTTPException as e:
         raise e
@@ -350,18 +502,20 @@ async def generate_leads_async(request: LeadRequest, background_tasks: Backgroun
     try:
         validate_api_key()
         
-        # Generate unique job ID
-        job_id = f"job_{datetime.utcnow().timestamp()}_{request.industry[:10]}"
+        # Random job ID: collision-free across workers sharing the job store
+        job_id = f"job_{secrets.token_hex(8)}"
+        now = datetime.utcnow().isoformat()
+        logger.info(f"Queued job {job_id} at {now}")
         
         # Initialize job
-        job_storage[job_id] = {
+        await save_job(job_id, {
             "status": "queued",
             "industry": request.industry,
             "number": request.number,
             "country": request.country,
-            "enable_web_scraping": request.enable_web_scraping,
-            "created_at": datetime.utcnow().isoformat()
-        }
+            "enable_web_scraping": int(request.enable_web_scraping),
+            "created_at": now
+        })
         
         # Add to background tasks
         background_tasks.add_task(
@@ -395,11 +549,10 @@ async def get_job_status(job_id: str):
     - completed: Job finished successfully
     - failed: Job encountered an error
     """
-    if job_id not in job_storage:
+    job = await load_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = job_storage[job_id]
-    
     response = {
         "job_id": job_id,
         "status": job['status'],
@@ -407,7 +560,7 @@ async def get_job_status(job_id: str):
     }
     
     if job['status'] == 'completed':
-        response['result'] = job.get('result')
+        response['result'] = orjson.Fragment(job['result_bytes'])
         response['completed_at'] = job.get('completed_at')
     elif job['status'] == 'failed':
         response['error'] = job.get('error')
@@ -415,31 +568,30 @@ async def get_job_status(job_id: str):
     elif job['status'] == 'processing':
         response['started_at'] = job.get('started_at')
     
-    return response
+    return Response(content=orjson.dumps(response), media_type="application/json")
 
 
 @app.get("/api/v1/leads/export/{job_id}", tags=["Leads"])
 async def export_leads(
     job_id: str,
-    format: str = Query(default="json", regex="^(json|csv)$")
+    format: ExportFormat = ExportFormat.json
 ):
     """
     Export leads in different formats (json or csv).
     Currently only JSON is supported.
     """
-    if job_id not in job_storage:
+    job = await load_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = job_storage[job_id]
-    
     if job['status'] != 'completed':
         raise HTTPException(
             status_code=400, 
             detail=f"Job is not completed yet. Current status: {job['status']}"
         )
     
-    if format == "json":
-        return job.get('result')
+    if format is ExportFormat.json:
+        return Response(content=job['result_bytes'], media_type="application/json")
     else:
         raise HTTPException(status_code=501, detail="CSV export not yet implemented")
 
@@ -479,57 +631,33 @@ async def send_email(request: EmailRequest):
         logger.info(f"Email send request: from={request.from_email}, to={request.to_email}")
         email_sender = get_email_sender()
         
-        # Process attachments (convert base64 to files)
-        import base64
-        import tempfile
-        import os as os_module
-        
+        # Decode attachments in memory as (filename, content, mimetype) tuples
         attachment_files = []
-        temp_files = []
         
         if request.attachments:
             for attachment in request.attachments:
                 try:
-                    # Decode base64 content
-                    file_content = base64.b64decode(attachment.content)
-                    
-                    # Create temporary file
-                    temp_file = tempfile.NamedTemporaryFile(
-                        delete=False,
-                        suffix=f"_{attachment.filename}",
-                        mode='wb'
+                    attachment_files.append(
+                        (attachment.filename, pybase64.b64decode(attachment.content, validate=False), attachment.mimetype)
                     )
-                    temp_file.write(file_content)
-                    temp_file.close()
-                    
-                    attachment_files.append(temp_file.name)
-                    temp_files.append(temp_file.name)
-                    
                 except Exception as e:
-                    print(f"⚠️ Failed to process attachment {attachment.filename}: {str(e)}")
+                    logger.warning(f"Failed to process attachment {attachment.filename}: {str(e)}")
         
         # Send email (from_email is now used properly)
         # CC the user so they get a copy of what they sent
         logger.info(f"Sending email via email service...")
-        result = email_sender.send_email(
+        result = await email_sender.send_email_async(
             from_email=request.from_email,
             to_email=request.to_email,
             subject=request.subject,
             contents=request.body,
             attachments=attachment_files if attachment_files else None,
-            cc_email=request.from_email  # User gets a copy
+            cc_emails=[request.from_email]  # User gets a copy
         )
         
         logger.info(f"Email send result: {result}")
         logger.info(f"Result type: {type(result)}, Success: {result.get('success')}")
         
-        # Clean up temporary files
-        for temp_file in temp_files:
-            try:
-                os_module.unlink(temp_file)
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to cleanup temp file: {cleanup_error}")
-        
         # Check if result is a dict and has success key
         if not isinstance(result, dict):
             logger.error(f"Invalid result type: {type(result)}, value: {result}")
@@ -565,6 +693,36 @@ async def send_email(request: EmailRequest):
         raise HTTPException(status_code=500, detail="Failed to send email. Please check your email configuration.")
 
 
+# Email content templates, built once at import time
+_PROMPT_TMPL = string.Template("""
+        Generate a professional email for the following:
+        
+        Company: $company
+        Purpose: $purpose
+        Tone: $tone
+        
+        Return a JSON object with:
+        {
+            "subject": "Email subject line",
+            "greeting": "Opening greeting",
+            "body": "Main email body (2-3 paragraphs)",
+            "call_to_action": "Closing call to action",
+            "closing": "Email closing signature"
+        }
+        
+        Make it compelling, personalized, and professional.
+        Return ONLY the JSON object, no additional text.
+        """)
+
+_SUGGEST_TMPL = {
+    "subject": "Exploring Partnership Opportunities with %(company)s",
+    "greeting": "Dear %(company)s Team,",
+    "body": "I hope this email finds you well. I came across %(company)s and was impressed by your work in the industry. I believe there could be valuable opportunities for collaboration between our organizations.\n\nI would love to schedule a brief call to discuss how we might work together to create mutual value.",
+    "call_to_action": "Would you be available for a 15-minute call next week?",
+    "closing": "Best regards,"
+}
+
+
 @app.post("/api/v1/email/generate-content", tags=["Email"])
 async def generate_email_content(
     company_name: str,
@@ -583,36 +741,12 @@ async def generate_email_content(
     try:
         validate_api_key()
         
-        client = GeminiClient()
-        
-        prompt = f"""
-        Generate a professional email for the following:
+        client = get_client()
         
-        Company: {company_name}
-        Purpose: {purpose}
-        Tone: {tone}
-        
-        Return a JSON object with:
-        {{
-            "subject": "Email subject line",
-            "greeting": "Opening greeting",
-            "body": "Main email body (2-3 paragraphs)",
-            "call_to_action": "Closing call to action",
-            "closing": "Email closing signature"
-        }}
-        
-        Make it compelling, personalized, and professional.
-        Return ONLY the JSON object, no additional text.
-        """
+        prompt = _PROMPT_TMPL.substitute(company=company_name, purpose=purpose, tone=tone)
         
         # Use the AI client to generate content (simplified for now)
-        suggestions = {
-            "subject": f"Exploring Partnership Opportunities with {company_name}",
-            "greeting": f"Dear {company_name} Team,",
-            "body": f"I hope this email finds you well. I came across {company_name} and was impressed by your work in the industry. I believe there could be valuable opportunities for collaboration between our organizations.\n\nI would love to schedule a brief call to discuss how we might work together to create mutual value.",
-            "call_to_action": "Would you be available for a 15-minute call next week?",
-            "closing": "Best regards,"
-        }
+        suggestions = {k: v % {"company": company_name} for k, v in _SUGGEST_TMPL.items()}
         
         return {
             "success": True,
@@ -641,7 +775,7 @@ async def analyze_leads_with_intelligence(request: LeadRequest):
         logger.info(f"Starting lead analysis: industry={request.industry}, number={request.number}, country={request.country}")
         
         # Generate leads first
-        result = generate_leads_sync(
+        result = await run_lead_generation(
             industry=request.industry,
             number=request.number,
             country=request.country,
@@ -736,21 +870,21 @@ class WebsiteBasedLeadRequest(BaseModel):
         min_length=5,
         max_length=500,
         description="URL of user's business/product website to analyze",
-        example="https://example.com"
+        examples=["https://example.com"]
     )
     number: int = Field(
         ...,
         ge=1,
         le=50,
         description="Number of leads to generate (1-50)",
-        example=10
+        examples=[10]
     )
     country: Optional[str] = Field(
         default=None,
         min_length=2,
         max_length=100,
         description="Optional country filter (if not provided, uses geographic focus from website)",
-        example="USA"
+        examples=["USA"]
     )
     enable_web_scraping: bool = Field(
         default=True,
@@ -761,7 +895,8 @@ class WebsiteBasedLeadRequest(BaseModel):
         description="Enable business intelligence analysis on generated leads"
     )
     
-    @validator('website_url')
+    @field_validator('website_url')
+    @classmethod
     def validate_website_url(cls, v):
         if not v or v.strip() == "":
             raise ValueError('Website URL cannot be empty')
@@ -796,10 +931,13 @@ async def generate_leads_from_user_website(request: WebsiteBasedLeadRequest):
         logger.info(f"Generating leads from website: {request.website_url}")
         
         # Step 1: Generate contextual leads from website
-        result = generate_leads_from_website(
-            website_url=request.website_url,
-            number=request.number,
-            country=request.country
+        result = await anyio.to_thread.run_sync(
+            partial(
+                generate_leads_from_website,
+                website_url=request.website_url,
+                number=request.number,
+                country=request.country
+            )
         )
         
         if not result.get('success'):
@@ -815,10 +953,12 @@ async def generate_leads_from_user_website(request: WebsiteBasedLeadRequest):
         # Step 2: Optionally enhance with web scraping
         if request.enable_web_scraping:
             logger.info("Enhancing leads with web scraping...")
-            from web_scraper import scrape_company_data_parallel
             leads_data = {'companies': leads}
-            # Use parallel scraping for faster performance
-            enhanced_data = scrape_company_data_parallel(leads_data, max_workers=3)
+            enhanced_data = await scrape_company_data_async(
+                leads_data,
+                client=_scrape_client,
+                max_concurrency=min(request.number, SCRAPE_MAX_CONCURRENCY)
+            )
             leads = enhanced_data.get('companies', leads)
         
         # Step 3: Optionally add business intelligence analysis
@@ -900,14 +1040,14 @@ class SMSRequest(BaseModel):
     phone_numbers: List[str] = Field(
         ...,
         description="List of phone numbers with country code (e.g., +254712345678)",
-        example=["+254712345678", "+254798765432"]
+        examples=[["+254712345678", "+254798765432"]]
     )
     message: str = Field(
         ...,
         min_length=1,
         max_length=1600,
         description="SMS message text (max 1600 characters)",
-        example="Your leads are ready! Check your dashboard."
+        examples=["Your leads are ready! Check your dashboard."]
     )
     sender_id: Optional[str] = Field(
         default=None,
@@ -1127,7 +1267,7 @@ class AvatarRequest(BaseModel):
     message_type: str = Field(
         default="introduction", 
         description="Type: introduction, follow_up, summary",
-        example="introduction"
+        examples=["introduction"]
     )
     custom_message: Optional[str] = Field(
         default=None,
@@ -1180,7 +1320,7 @@ async def generate_avatar_voice(request: AvatarRequest):
                 raise HTTPException(status_code=500, detail=result["error"])
             
             # Decode base64 audio
-            audio_bytes = base64.b64decode(result['audio_base64'])
+            audio_bytes = pybase64.b64decode(result['audio_base64'])
             
             # Return audio file
             return Response(
@@ -1234,7 +1374,7 @@ async def generate_lead_summary_voice(leads: List[Dict]):
             raise HTTPException(status_code=500, detail=result["error"])
         
         # Decode base64 audio
-        audio_bytes = base64.b64decode(result['audio_base64'])
+        audio_bytes = pybase64.b64decode(result['audio_base64'])
         
         return Response(
             content=audio_bytes,
@@ -1283,25 +1423,34 @@ async def get_available_voices():
 
 # ========== Startup & Shutdown Events ==========
 
-@app.on_event("startup")
 async def startup_event():
     """Run on API startup"""
+    app.state.gemini_api_key = os.getenv('GEMINI_API_KEY')
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
     logger.info("="*60)
     logger.info("🚀 Lead Generator API Starting...")
     logger.info("="*60)
     logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
     logger.info(f"CORS Allowed Origins: {ALLOWED_ORIGINS}")
-    logger.info(f"Gemini API Key: {'✅ Configured' if os.getenv('GEMINI_API_KEY') else '❌ Missing'}")
+    logger.info(f"Gemini API Key: {'✅ Configured' if app.state.gemini_api_key else '❌ Missing'}")
     logger.info(f"Email Service: {'✅ Configured' if os.getenv('EMAIL_USER') or os.getenv('SENDGRID_API_KEY') else '⚠️ Not configured'}")
     logger.info(f"ElevenLabs Avatar: {'✅ Configured' if os.getenv('ELEVENLABS_API_KEY') else '⚠️ Not configured'}")
     logger.info(f"Africa's Talking: {'✅ Configured' if os.getenv('AFRICASTALKING_API_KEY') else '⚠️ Not configured'}")
+    logger.info(f"Job Storage: {'✅ Redis' if redis_client else '⚠️ In-memory (single worker only)'}")
     logger.info("="*60)
 
 
-@app.on_event("shutdown")
 async def shutdown_event():
     """Run on API shutdown"""
     logger.info("🛑 Lead Generator API Shutting Down...")
+    await _scrape_client.aclose()
+    if get_client.cache_info().currsize:
+        await anyio.to_thread.run_sync(get_client().close)
+    if get_email_sender.cache_info().currsize:
+        await get_email_sender().aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
 
 
 # ========== Run Server ==========
@@ -1331,13 +1480,20 @@ if __name__ == "__main__":
         print("   Add to .env file or environment variables")
         sys.exit(1)
     
+    # Job storage is per-process without Redis, so only scale out when it is configured
+    default_workers = (os.cpu_count() or 1) if REDIS_URL else 1
+    
     uvicorn.run(
         "api:app",
         host="0.0.0.0",
         port=int(os.getenv('PORT', 8000)),
-        reload=True,  # Auto-reload in development (change to False for production)
+        # "auto" resolves to uvloop/httptools when installed (uvicorn[standard] on Linux/macOS)
+        # and falls back to asyncio/h11 on Windows
+        loop="auto",
+        http="auto",
+        reload=os.getenv('DEV', '0') == '1',  # Auto-reload only when DEV=1 (runs a single worker)
         log_level="info" if is_production else "debug",
         access_log=is_production,
-        workers=1  # For development; use multiple workers in Docker
+        workers=int(os.getenv('WEB_CONCURRENCY', default_workers))
     )
 
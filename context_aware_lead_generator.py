@@ -7,7 +7,7 @@ import os
 import json
 import logging
 from typing import Dict, List, Optional
-from generate_health_insurance import GeminiClient
+from generate_health_insurance import get_client
 from website_content_analyzer import analyze_website_content
 from business_insights_extractor import extract_business_insights
 
@@ -21,7 +21,7 @@ class ContextAwareLeadGenerator:
     """
     
     def __init__(self):
-        self.gemini_client = GeminiClient()
+        self.gemini_client = get_client()
     
     def generate_contextual_leads(
         self,
@@ -5,25 +5,41 @@ Supports multiple sending methods:
 2. Yagmail with Reply-To (Fallback method)
 """
 
+import io
 import os
+import pybase64
+import httpx
+import aiosmtplib
 import yagmail
-from typing import List, Union
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# In-memory attachment: (filename, raw content, MIME type)
+Attachment = Tuple[str, bytes, str]
+
 
 class SendGridEmailSender:
     """SendGrid email sender - allows sending from any verified email"""
     def __init__(self):
         try:
             from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail, Email, To, Content
+            from sendgrid.helpers.mail import (
+                Mail, Email, To, Content, Attachment as SendGridAttachment,
+                FileContent, FileName, FileType, Disposition
+            )
             self.SendGridAPIClient = SendGridAPIClient
             self.Mail = Mail
             self.Email = Email
             self.To = To
             self.Content = Content
+            self.Attachment = SendGridAttachment
+            self.FileContent = FileContent
+            self.FileName = FileName
+            self.FileType = FileType
+            self.Disposition = Disposition
         except ImportError:
             raise ImportError("SendGrid not installed. Run: pip install sendgrid")
         
@@ -32,6 +48,48 @@ class SendGridEmailSender:
             raise ValueError("Please set SENDGRID_API_KEY in .env file")
         
         self.client = SendGridAPIClient(self.api_key)
+        # Async REST client for the API server; one keep-alive pool per process
+        self.async_client = httpx.AsyncClient(
+            base_url="https://api.sendgrid.com",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            http2=True,
+            timeout=30.0
+        )
+    
+    def _build_message(
+        self,
+        from_email: str,
+        to_email: Union[str, List[str]],
+        subject: str,
+        contents: str,
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
+    ):
+        """Build a SendGrid Mail object"""
+        from sendgrid.helpers.mail import Cc
+        
+        message = self.Mail(
+            from_email=self.Email(from_email),
+            to_emails=self.To(to_email),
+            subject=subject,
+            html_content=self.Content("text/html", contents)
+        )
+        
+        # Add CC if provided
+        for cc_email in cc_emails:
+            message.add_cc(Cc(cc_email))
+            print(f"📧 CC: {cc_email}")
+        
+        # SendGrid takes attachment content as base64 text
+        for filename, content, mimetype in attachments or []:
+            message.add_attachment(self.Attachment(
+                self.FileContent(pybase64.b64encode(content).decode()),
+                self.FileName(filename),
+                self.FileType(mimetype),
+                self.Disposition('attachment')
+            ))
+        
+        return message
     
     def send_email(
         self,
@@ -39,29 +97,17 @@ class SendGridEmailSender:
         to_email: Union[str, List[str]],
         subject: str,
         contents: str,
-        attachments: List[str] = None,
-        cc_email: str = None
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
     ) -> bool:
         """Send email via SendGrid from any verified email"""
         try:
-            from sendgrid.helpers.mail import Cc
-            
-            message = self.Mail(
-                from_email=self.Email(from_email),
-                to_emails=self.To(to_email),
-                subject=subject,
-                html_content=self.Content("text/html", contents)
-            )
-            
-            # Add CC if provided
-            if cc_email:
-                message.add_cc(Cc(cc_email))
-                print(f"📧 CC: {cc_email}")
+            message = self._build_message(from_email, to_email, subject, contents, attachments, cc_emails)
             
             response = self.client.send(message)
             print(f"✅ SendGrid: Email sent to {to_email} from {from_email}")
-            if cc_email:
-                print(f"   CC sent to: {cc_email}")
+            if cc_emails:
+                print(f"   CC sent to: {', '.join(cc_emails)}")
             return True
         except Exception as e:
             error_msg = f"SendGrid failed: {str(e)}"
@@ -70,6 +116,44 @@ class SendGridEmailSender:
             import traceback
             print(f"Full traceback: {traceback.format_exc()}")
             raise Exception(error_msg)  # Raise instead of returning False
+    
+    async def send_email_async(
+        self,
+        from_email: str,
+        to_email: Union[str, List[str]],
+        subject: str,
+        contents: str,
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
+    ) -> bool:
+        """Send email via the SendGrid REST API without blocking the event loop"""
+        try:
+            message = self._build_message(from_email, to_email, subject, contents, attachments, cc_emails)
+            
+            response = await self.async_client.post("/v3/mail/send", json=message.get())
+            response.raise_for_status()
+            print(f"✅ SendGrid: Email sent to {to_email} from {from_email}")
+            if cc_emails:
+                print(f"   CC sent to: {', '.join(cc_emails)}")
+            return True
+        except Exception as e:
+            error_msg = f"SendGrid failed: {str(e)}"
+            print(f"❌ {error_msg}")
+            raise Exception(error_msg)
+    
+    async def aclose(self):
+        """Close the pooled HTTP client used by send_email_async"""
+        await self.async_client.aclose()
+
+
+def _attachment_buffers(attachments: List[Attachment]) -> List[io.BytesIO]:
+    """Wrap attachments as named file-like objects (Yagmail takes the filename from .name)"""
+    buffers = []
+    for filename, content, _mimetype in attachments or []:
+        buffer = io.BytesIO(content)
+        buffer.name = filename
+        buffers.append(buffer)
+    return buffers or None
 
 
 class YagmailEmailSender:
@@ -84,6 +168,8 @@ class YagmailEmailSender:
         # Get SMTP settings from environment or use defaults
         smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         smtp_port = int(os.getenv('SMTP_PORT', '465'))  # Default to 465 (SSL)
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
         
         # Configure based on port
         if smtp_port == 465:
@@ -125,8 +211,8 @@ class YagmailEmailSender:
         to_email: Union[str, List[str]],
         subject: str,
         contents: str,
-        attachments: List[str] = None,
-        cc_email: str = None
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
     ) -> bool:
         """
         Send email with Reply-To header and CC support.
@@ -137,7 +223,7 @@ class YagmailEmailSender:
         The recipient will see:
         - From: EMAIL_USER
         - Reply-To: from_email
-        - CC: cc_email (if provided)
+        - CC: cc_emails (if provided)
         - Clean email content without any banners
         """
         try:
@@ -147,24 +233,22 @@ class YagmailEmailSender:
             }
             
             # Send clean email without banners
-            # Prepare CC list
-            cc_list = None
-            if cc_email:
-                cc_list = [cc_email] if isinstance(cc_email, str) else cc_email
-                print(f"📧 CC: {cc_email}")
+            cc_list = list(cc_emails)
+            if cc_list:
+                print(f"📧 CC: {', '.join(cc_list)}")
             
             self.yag.send(
                 to=to_email,
                 subject=subject,
                 contents=contents,  # Clean content without banners
-                attachments=attachments,
+                attachments=_attachment_buffers(attachments),
                 headers=headers,
-                cc=cc_list
+                cc=cc_list or None
             )
             
             print(f"✅ Yagmail: Email sent to {to_email} (on behalf of {from_email})")
-            if cc_email:
-                print(f"   CC sent to: {cc_email}")
+            if cc_emails:
+                print(f"   CC sent to: {', '.join(cc_emails)}")
             print(f"   Note: Replies will go to {from_email}")
             return True
         except Exception as e:
@@ -174,6 +258,56 @@ class YagmailEmailSender:
             import traceback
             print(f"Full traceback: {traceback.format_exc()}")
             raise Exception(error_msg)  # Raise instead of returning False
+    
+    async def send_email_async(
+        self,
+        from_email: str,
+        to_email: Union[str, List[str]],
+        subject: str,
+        contents: str,
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
+    ) -> bool:
+        """
+        Async variant of send_email.
+        
+        Yagmail only builds the MIME message; delivery goes through aiosmtplib
+        so the event loop is not blocked on the SMTP socket.
+        """
+        try:
+            cc_list = list(cc_emails)
+            if cc_list:
+                print(f"📧 CC: {', '.join(cc_list)}")
+            
+            recipients, message = self.yag.prepare_send(
+                to=to_email,
+                subject=subject,
+                contents=contents,
+                attachments=_attachment_buffers(attachments),
+                headers={'Reply-To': from_email},
+                cc=cc_list or None
+            )
+            
+            await aiosmtplib.send(
+                message,
+                sender=self.email_user,
+                recipients=recipients,
+                hostname=self.smtp_server,
+                port=self.smtp_port,
+                username=self.email_user,
+                password=self.email_password,
+                use_tls=self.smtp_port == 465,
+                start_tls=True if self.smtp_port == 587 else None
+            )
+            
+            print(f"✅ Yagmail: Email sent to {to_email} (on behalf of {from_email})")
+            if cc_emails:
+                print(f"   CC sent to: {', '.join(cc_emails)}")
+            return True
+        except Exception as e:
+            error_msg = f"Yagmail failed: {str(e)}"
+            print(f"❌ {error_msg}")
+            raise Exception(error_msg)
 
 
 class EmailSender:
@@ -219,8 +353,8 @@ class EmailSender:
         to_email: Union[str, List[str]],
         subject: str,
         contents: str,
-        attachments: List[str] = None,
-        cc_email: str = None
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
     ) -> dict:
         """
         Send email using configured method.
@@ -230,54 +364,78 @@ class EmailSender:
             to_email: Recipient email address
             subject: Email subject
             contents: Email body (HTML supported)
-            attachments: Optional file paths
-            cc_email: Optional CC email address (user gets a copy)
+            attachments: Optional (filename, content, mimetype) tuples
+            cc_emails: Optional CC addresses (e.g. the user, to get a copy)
             
         Returns:
             dict: {success: bool, method: str, message: str}
         """
         try:
             # This will now raise an exception if it fails
-            success = self.sender.send_email(
+            self.sender.send_email(
                 from_email=from_email,
                 to_email=to_email,
                 subject=subject,
                 contents=contents,
                 attachments=attachments,
-                cc_email=cc_email
+                cc_emails=cc_emails
             )
-            
-            # If we get here, it succeeded
-            message = f"Email sent successfully via {self.method}"
-            if cc_email:
-                message += f" (copy sent to {cc_email})"
-            
-            return {
-                "success": True,
-                "method": self.method,
-                "message": message,
-                "from": from_email,
-                "to": to_email,
-                "cc": cc_email
-            }
         except Exception as e:
             # Now we have the actual error message
-            return {
-                "success": False,
-                "method": self.method,
-                "message": str(e),  # Use the actual error message
-                "from": from_email,
-                "to": to_email,
-                "cc": cc_email
-            }
+            return self._result(False, str(e), from_email, to_email, cc_emails)
+        
+        return self._result(True, None, from_email, to_email, cc_emails)
+    
+    async def send_email_async(
+        self,
+        from_email: str,
+        to_email: Union[str, List[str]],
+        subject: str,
+        contents: str,
+        attachments: List[Attachment] = None,
+        cc_emails: Sequence[str] = ()
+    ) -> dict:
+        """Async variant of send_email for the API server (same arguments and result)"""
+        try:
+            await self.sender.send_email_async(
+                from_email=from_email,
+                to_email=to_email,
+                subject=subject,
+                contents=contents,
+                attachments=attachments,
+                cc_emails=cc_emails
+            )
+        except Exception as e:
+            return self._result(False, str(e), from_email, to_email, cc_emails)
+        
+        return self._result(True, None, from_email, to_email, cc_emails)
+    
+    async def aclose(self):
+        """Release connections held by the underlying sender, if it keeps any"""
+        if hasattr(self.sender, 'aclose'):
+            await self.sender.aclose()
+    
+    def _result(self, success: bool, error: str, from_email, to_email, cc_emails) -> dict:
+        """Build the {success, method, message, ...} result dict"""
+        if success:
+            message = f"Email sent successfully via {self.method}"
+            if cc_emails:
+                message += f" (copy sent to {', '.join(cc_emails)})"
+        else:
+            message = error
+        
+        return {
+            "success": success,
+            "method": self.method,
+            "message": message,
+            "from": from_email,
+            "to": to_email,
+            "cc": list(cc_emails)
+        }
 
 
 # Singleton instance
-_email_sender = None
-
-def get_email_sender():
+@lru_cache(maxsize=1)
+def get_email_sender() -> EmailSender:
     """Get or create email sender singleton"""
-    global _email_sender
-    if _email_sender is None:
-        _email_sender = EmailSender()
-    return _email_sender
+    return EmailSender()
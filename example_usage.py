@@ -8,9 +8,9 @@ This script demonstrates how to:
 """
 
 import os
-import json
+import orjson
 from dotenv import load_dotenv
-from generate_health_insurance import GeminiClient
+from generate_health_insurance import get_client
 from web_scraper import scrape_company_data
 
 # Load environment variables
@@ -37,7 +37,7 @@ def generate_leads_with_scraping(industry: str, number: int, country: str, enabl
     
     # Step 1: Generate AI-powered leads
     print("\n[Step 1/2] Generating leads with AI...")
-    client = GeminiClient()
+    client = get_client()
     result = client.generate_companies(industry, number, country)
     
     print(f"✓ Generated {len(result.get('companies', []))} companies")
@@ -55,8 +55,8 @@ def generate_leads_with_scraping(industry: str, number: int, country: str, enabl
 
 def save_results(data: dict, filename: str = "leads.json"):
     """Save results to a JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     print(f"\n✓ Results saved to {filename}")
 
 def display_summary(data: dict):
@@ -69,12 +69,12 @@ def display_summary(data: dict):
     
     print(f"\nTotal Companies: {len(companies)}")
     
-    # Count companies with contact emails
-    with_emails = sum(1 for c in companies if c.get('contact_email'))
+    # Count companies with contact emails and social media in one pass
+    with_emails = with_social = 0
+    for c in companies:
+        with_emails += bool(c.get('contact_email'))
+        with_social += bool(c.get('social_media'))
     print(f"Companies with Contact Emails: {with_emails}")
-    
-    # Count companies with social media
-    with_social = sum(1 for c in companies if c.get('social_media'))
     print(f"Companies with Social Media: {with_social}")
     
     # Display first 3 companies as examples
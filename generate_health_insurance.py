@@ -1,50 +1,64 @@
 import os
 import json
 import time
+import random
+import asyncio
+import hashlib
 import logging
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError
+import sqlite3
+import threading
+import httpx
+from functools import lru_cache
+import ijson
+import pybreaker
+from aiolimiter import AsyncLimiter
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, APIConnectionError, APIStatusError
 from dotenv import load_dotenv
+from retry_utils import MalformedResponseError, classify, retry_after
+from web_scraper import scrape_companies_async
 
-load_dotenv()
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Only read .env when the environment isn't already configured
+if not os.getenv("GEMINI_API_KEY"):
+    load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class GeminiClient:
-    def __init__(self):
-        # Gemini's OpenAI-compatible endpoint
-        base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
-        
-        self.client = OpenAI(
-            api_key=os.getenv('GEMINI_API_KEY'),
-            base_url=base_url
-        )
+
+def _loads(data):
+    """Parse JSON text or bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj, indent=False):
+    """Serialize obj to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode()
+
+# Default location of the on-disk response cache
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "leadmagnet")
+
+class _BreakerLogListener(pybreaker.CircuitBreakerListener):
+    """Log Gemini circuit breaker state changes"""
     
-    def generate_companies(self, industry, number, country, max_retries=5, initial_delay=2):
-        """
-        Generate companies with automatic retry logic for 503 errors.
-        
-        Args:
-            industry: Industry to target
-            number: Number of companies to generate
-            country: Country to focus on
-            max_retries: Maximum number of retry attempts (default: 5)
-            initial_delay: Initial delay in seconds before first retry (default: 2)
-        
-        Returns:
-            JSON response with companies data
+    def state_change(self, cb, old_state, new_state):
+        logger.warning("Gemini circuit breaker: %s -> %s", old_state.name, new_state.name)
+
+
+# Output format instructions shared by the single and batch prompts
+JSON_ONLY_INSTRUCTIONS = """**IMPORTANT: You must return your response as a valid JSON object only. Do not include any markdown formatting, code blocks, or additional text outside the JSON.**
         
-        Raises:
-            Exception: If all retries are exhausted
         """
-        prompt = f"""
-        You are a professional lead generation expert. Generate a comprehensive list of {number} companies in the {industry} industry that are based in or operate in {country}.
-        
-        **IMPORTANT: You must return your response as a valid JSON object only. Do not include any markdown formatting, code blocks, or additional text outside the JSON.**
-        
-        Return a JSON object with this structure:
-        {{
-            "companies": [
-                {{
+
+# JSON structure of a single company, embedded in each prompt's top-level structure
+COMPANY_SCHEMA = """                {{
                     "company_name": "Official company name",
                     "website_url": "Official website link",
                     "company_size": "Number of employees (approximate range)",
@@ -65,9 +79,10 @@ class GeminiClient:
                     "recent_news_insights": "Recent developments, partnerships, or notable information",
                     "decision_maker_roles": ["CEO", "CFO", "VP of Sales", "etc."]
                 }}
-            ]
-        }}
-        
+"""
+
+# Field rules shared by the single and batch prompts
+COMPANY_FIELD_RULES = """        
         Focus on providing accurate, up-to-date information that would be valuable for business development and lead generation purposes.
         
         **CRITICAL: If any information is not publicly available or cannot be found, set that field to null (not the string "Not publicly available", but the JSON null value).**
@@ -80,145 +95,716 @@ class GeminiClient:
         
         Remember: Return ONLY the JSON object, no additional text or formatting.
         """
+
+# Lead generation prompt, filled in with str.format_map per request
+PROMPT_TEMPLATE = """
+        You are a professional lead generation expert. Generate a comprehensive list of {number} companies in the {industry} industry that are based in or operate in {country}.
+        {shard_scope}
+        
+        """ + JSON_ONLY_INSTRUCTIONS + """Return a JSON object with this structure:
+        {{
+            "companies": [
+""" + COMPANY_SCHEMA + """            ]
+        }}
+""" + COMPANY_FIELD_RULES
+
+# Several (industry, number, country) jobs answered by a single request
+BATCH_PROMPT_TEMPLATE = """
+        You are a professional lead generation expert. Below is a JSON array of lead generation jobs. For each job, generate a comprehensive list of "number" companies in the job's "industry" that are based in or operate in the job's "country".
+        
+        Jobs:
+        {jobs}
+        
+        """ + JSON_ONLY_INSTRUCTIONS + """Return a JSON object with this structure, with exactly one entry in "results" per job, where "job_index" is the job's position in the array (starting at 0):
+        {{
+            "results": [
+                {{
+                    "job_index": 0,
+                    "companies": [
+""" + COMPANY_SCHEMA + """                    ]
+                }}
+            ]
+        }}
+""" + COMPANY_FIELD_RULES
+
+# Extra instruction added when a request is split into several shards
+SHARD_SCOPE_TEMPLATE = (
+    "List the companies ranked #{start} to #{end} by market size in {country}, "
+    "so this list does not overlap with other batches."
+)
+
+# Second pass sent to the verifier model to fill in fields the bulk pass left empty
+VERIFY_PROMPT_TEMPLATE = """
+        You are a professional lead research analyst. Below is a JSON object with a list of companies in the {industry} industry in {country}.
+        
+        For every company, fill in any field that is null if the information is publicly available. Do not change fields that already have a value, and do not add or remove companies.
+        
+        Return the complete JSON object with the same structure, and nothing else.
+        
+        {companies}
+        """
+
+
+class PromptCache:
+    """
+    Persistent prompt -> response cache backed by SQLite.
+    
+    Entries older than ttl seconds are treated as missing. Database errors are
+    logged and treated as a cache miss so they never fail a generation.
+    """
+    
+    def __init__(self, path=None, ttl=7 * 24 * 3600):
+        self.path = path or os.path.join(CACHE_DIR, "prompts.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)"
+            )
+    
+    @staticmethod
+    def make_key(model, prompt):
+        """Cache key for a prompt sent to a given model"""
+        return hashlib.sha256((model + "|" + prompt).encode()).hexdigest()
+    
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, ts FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Prompt cache lookup failed: %s", e)
+            return None
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+    
+    def set(self, key, value):
+        """Store value under key, replacing any previous entry"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, ts) VALUES (?, ?, ?)",
+                    (key, value, int(time.time()))
+                )
+        except sqlite3.Error as e:
+            logger.warning("Prompt cache store failed: %s", e)
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        cache_enabled=False,
+        cache_ttl=7 * 24 * 3600,
+        rpm=None,
+        model="gemini-2.5-flash",
+        verifier_model="gemini-2.5-pro"
+    ):
+        # Gemini's OpenAI-compatible endpoint
+        base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
+        
+        # Fast model for bulk generation; the slower verifier model is only used
+        # by the optional averify_companies pass
+        self.model = model
+        self.verifier_model = verifier_model
+        
+        # Keep-alive HTTP/2 pool shared by every call made through this client,
+        # so concurrent shards multiplex over the same TLS connections
+        self._http = DefaultAsyncHttpxClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+        )
+        self.client = AsyncOpenAI(
+            api_key=os.getenv('GEMINI_API_KEY'),
+            base_url=base_url,
+            http_client=self._http
+        )
+        
+        # Pace requests under the account's requests-per-minute quota instead of
+        # waiting for 429s; sync calls run on the same loop so they share it
+        if rpm is None:
+            rpm = int(os.getenv("GEMINI_RPM", "60"))
+        self._rpm = AsyncLimiter(max_rate=rpm, time_period=60)
+        
+        # Fail fast once the API keeps failing instead of every shard burning its
+        # full retry budget. Each request whose retries are exhausted counts as one
+        # failure; client errors (e.g. 400/401) and other non-retryable errors don't
+        self._breaker = pybreaker.CircuitBreaker(
+            fail_max=3,
+            reset_timeout=30,
+            exclude=[
+                lambda e: not classify(e.__cause__ or e)[0]
+            ],
+            listeners=[_BreakerLogListener()]
+        )
+        
+        # Identical prompts are answered from disk instead of calling the API again.
+        # Off by default: meant for repeated CLI/dev runs, not the API server,
+        # which has its own TTL-bound leads cache
+        self.cache = None
+        if cache_enabled:
+            try:
+                self.cache = PromptCache(ttl=cache_ttl)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Prompt cache disabled: %s", e)
+        
+        # Event loop thread backing the sync wrappers; started on first use so the
+        # async connection pool stays bound to a single loop across calls
+        self._loop = None
+        self._loop_lock = threading.Lock()
+    
+    def _run(self, coro):
+        """Run a coroutine on this client's event loop thread and wait for the result"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="gemini-client-loop",
+                    daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    async def aclose(self):
+        """Close the HTTP connection pool"""
+        await self._http.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    def close(self):
+        """Close the connection pool and stop the event loop used by the sync wrappers"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    
+    def generate_companies(self, industry, number, country, max_retries=5, initial_delay=2, shard_size=5, cap_delay=60):
+        """
+        Generate companies with automatic retry logic for 503 errors.
+        
+        Blocking wrapper around agenerate_companies, safe to call from any thread
+        that is not running an event loop.
+        
+        Args:
+            industry: Industry to target
+            number: Number of companies to generate
+            country: Country to focus on
+            max_retries: Maximum number of retry attempts (default: 5)
+            initial_delay: Initial delay in seconds before first retry (default: 2)
+            shard_size: Companies requested per concurrent API call (default: 5)
+            cap_delay: Upper bound in seconds for a single retry delay (default: 60)
+        
+        Returns:
+            JSON response with companies data
+        
+        Raises:
+            Exception: If all retries are exhausted
+        """
+        return self._run(
+            self.agenerate_companies(industry, number, country, max_retries, initial_delay, shard_size, cap_delay)
+        )
+    
+    async def agenerate_companies(self, industry, number, country, max_retries=5, initial_delay=2, shard_size=5, cap_delay=60):
+        """
+        Generate companies by splitting the request into shards run concurrently.
+        
+        Each shard asks for a distinct rank range so the merged list does not
+        repeat companies; any duplicates that slip through are dropped by name.
+        When some shards fail, the companies from the others are still returned
+        along with a "failed_shards" count, so callers can avoid caching a short list.
+        
+        Returns:
+            JSON response with companies data (at most number companies)
+        
+        Raises:
+            Exception: If every shard fails
+        """
+        shard_size = max(1, shard_size)
+        shards = [
+            (start, min(shard_size, number - start + 1))
+            for start in range(1, number + 1, shard_size)
+        ]
+        
+        results = await asyncio.gather(
+            *[
+                self._generate_shard(
+                    industry, n, country, max_retries, initial_delay, cap_delay,
+                    rank_start=start if len(shards) > 1 else None
+                )
+                for start, n in shards
+            ],
+            return_exceptions=True
+        )
+        
+        companies = []
+        seen = set()
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("Lead generation shard failed: %s", result)
+                errors.append(result)
+                continue
+            if 'companies' not in result:
+                errors.append(result)
+                continue
+            for company in result['companies']:
+                name = str(company.get('company_name') or '').strip().lower()
+                if name and name in seen:
+                    continue
+                seen.add(name)
+                companies.append(company)
+        
+        if not companies and errors:
+            # Nothing usable came back: surface the first failure unchanged
+            if isinstance(errors[0], BaseException):
+                raise errors[0]
+            return errors[0]
+        
+        result = {"companies": companies[:number]}
+        if errors:
+            result["failed_shards"] = len(errors)
+        return result
+    
+    def generate_companies_batch(self, jobs, max_retries=5, initial_delay=2, cap_delay=60):
+        """
+        Generate companies for several jobs with a single API request.
+        
+        Blocking wrapper around agenerate_companies_batch.
+        
+        Args:
+            jobs: List of (industry, number, country) tuples
+        
+        Returns:
+            Dict mapping each job tuple to its JSON response with companies data
+        """
+        return self._run(
+            self.agenerate_companies_batch(jobs, max_retries, initial_delay, cap_delay)
+        )
+    
+    async def agenerate_companies_batch(self, jobs, max_retries=5, initial_delay=2, cap_delay=60):
+        """
+        Generate companies for several jobs with a single API request.
+        
+        The shared output instructions are sent once for the whole batch instead
+        of once per job. A single job goes through agenerate_companies as usual.
+        
+        Jobs the batch response left without companies are generated again
+        individually.
+        
+        Args:
+            jobs: List of distinct (industry, number, country) tuples
+        
+        Returns:
+            Dict mapping each job tuple to its JSON response with companies data
+        
+        Raises:
+            ValueError: If the same job is listed more than once
+            Exception: If all retries are exhausted
+        """
+        jobs = [tuple(job) for job in jobs]
+        if len(set(jobs)) != len(jobs):
+            raise ValueError("Duplicate jobs in batch; results are keyed by job")
+        if len(jobs) <= 1:
+            return {
+                job: await self.agenerate_companies(*job, max_retries=max_retries, initial_delay=initial_delay, cap_delay=cap_delay)
+                for job in jobs
+            }
+        
+        prompt = BATCH_PROMPT_TEMPLATE.format_map({
+            "jobs": _dumps([
+                {"industry": industry, "number": number, "country": country}
+                for industry, number, country in jobs
+            ]).decode()
+        })
+        response = await self._complete_json(prompt, 'results', max_retries, initial_delay, cap_delay)
+        
+        results = {}
+        for entry in response['results']:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get('job_index')
+            companies = entry.get('companies')
+            if isinstance(index, int) and 0 <= index < len(jobs) and isinstance(companies, list) and companies:
+                results[jobs[index]] = {"companies": companies}
+        
+        missing = [job for job in jobs if job not in results]
+        if missing:
+            logger.warning(
+                "Batch response had no companies for %d job(s), generating them individually: %s",
+                len(missing), missing
+            )
+            fallback = await asyncio.gather(*[
+                self.agenerate_companies(*job, max_retries=max_retries, initial_delay=initial_delay, cap_delay=cap_delay)
+                for job in missing
+            ])
+            results.update(zip(missing, fallback))
+        
+        return {job: results[job] for job in jobs}
+    
+    async def astream_companies(self, industry, number, country, max_retries=5, initial_delay=2, cap_delay=60):
+        """
+        Yield companies one at a time while a single streamed completion is parsed.
+        
+        Cached prompts are served without calling the API. If the stream fails
+        or ends before any company arrives, falls back to a regular (retried)
+        request.
+        
+        Yields:
+            Company dicts in the order the model produces them
+        """
+        prompt = self._build_prompt(industry, number, country)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = PromptCache.make_key(self.model, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving companies from prompt cache")
+                for company in _loads(cached).get('companies', []):
+                    yield company
+                return
+        
+        companies = []
+        try:
+            if self._breaker.current_state == pybreaker.STATE_OPEN:
+                # Let the regular request below fail fast with the breaker's 503
+                raise pybreaker.CircuitBreakerError("Circuit breaker is open")
+            async for company in self._stream_shard(prompt):
+                companies.append(company)
+                yield company
+        except (APIStatusError, APIConnectionError, ijson.JSONError, pybreaker.CircuitBreakerError) as e:
+            if companies:
+                raise
+            logger.warning("Streaming failed (%s), falling back to a regular request", e)
+        else:
+            if companies:
+                if cache_key is not None:
+                    self.cache.set(cache_key, _dumps({"companies": companies}).decode())
+                return
+            logger.warning("Stream returned no companies, falling back to a regular request")
+        
+        result = await self._generate_shard(
+            industry, number, country, max_retries, initial_delay, cap_delay
+        )
+        for company in result.get('companies', []):
+            yield company
+    
+    async def averify_companies(self, result, industry, country):
+        """
+        Fill in null fields of generated companies with a pass on the verifier model.
+        
+        Only empty fields are filled; existing values are kept. On any failure the
+        original result is returned unchanged.
+        
+        Returns:
+            JSON response with companies data
+        """
+        companies = result.get('companies')
+        if not self.verifier_model or not companies:
+            return result
+        
+        prompt = VERIFY_PROMPT_TEMPLATE.format_map({
+            "industry": industry,
+            "country": country,
+            "companies": _dumps({"companies": companies}).decode()
+        })
+        
+        try:
+            verified = await self._complete_json(prompt, 'companies', model=self.verifier_model)
+        except Exception as e:
+            logger.warning("Verification pass failed, keeping unverified leads: %s", e)
+            return result
+        
+        verified_companies = verified.get('companies') if isinstance(verified, dict) else None
+        if not isinstance(verified_companies, list):
+            logger.warning("Verification pass returned no company list, keeping unverified leads")
+            return result
+        
+        by_name = {
+            str(company.get('company_name') or '').strip().lower(): company
+            for company in verified_companies
+            if isinstance(company, dict)
+        }
+        for company in companies:
+            match = by_name.get(str(company.get('company_name') or '').strip().lower())
+            if not match:
+                continue
+            for key, value in match.items():
+                if company.get(key) is None and value is not None:
+                    company[key] = value
+        
+        return result
+    
+    def _build_prompt(self, industry, number, country, rank_start=None):
+        """Render the lead generation prompt for one request or shard"""
+        if rank_start is None:
+            shard_scope = ""
+        else:
+            shard_scope = SHARD_SCOPE_TEMPLATE.format_map({
+                "start": rank_start,
+                "end": rank_start + number - 1,
+                "country": country
+            })
+        
+        return PROMPT_TEMPLATE.format_map({
+            "industry": industry,
+            "number": number,
+            "country": country,
+            "shard_scope": shard_scope
+        })
+    
+    async def _stream_shard(self, prompt):
+        """Stream one completion, yielding each company as soon as its JSON object is complete"""
+        companies = ijson.sendable_list()
+        parser = ijson.items_coro(companies, 'companies.item', use_float=True)
+        
+        async with self._rpm:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                response_format={"type": "json_object"},
+                stream=True
+            )
+        
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                parser.send(chunk.choices[0].delta.content.encode())
+                for company in companies:
+                    yield company
+                del companies[:]
+            parser.close()
+            for company in companies:
+                yield company
+        finally:
+            await stream.close()
+    
+    async def _generate_shard(self, industry, number, country, max_retries=5, initial_delay=2, cap_delay=60, rank_start=None):
+        """
+        Generate a single batch of companies with automatic retry logic for 503 errors.
+        
+        Args:
+            industry: Industry to target
+            number: Number of companies in this batch
+            country: Country to focus on
+            max_retries: Maximum number of retry attempts (default: 5)
+            initial_delay: Initial delay in seconds before first retry (default: 2)
+            cap_delay: Upper bound in seconds for a single retry delay (default: 60)
+            rank_start: First rank of this batch when the request is sharded
+        
+        Returns:
+            JSON response with companies data
+        
+        Raises:
+            Exception: If all retries are exhausted
+        """
+        prompt = self._build_prompt(industry, number, country, rank_start)
+        return await self._complete_json(prompt, 'companies', max_retries, initial_delay, cap_delay)
+    
+    async def _complete_json(self, prompt, result_key, max_retries=5, initial_delay=2, cap_delay=60, model=None):
+        """
+        Send a prompt in JSON mode with automatic retry logic for 503 errors.
+        
+        Only responses containing result_key are accepted and cached. The whole
+        retry loop runs inside the circuit breaker, so a request only counts as a
+        breaker failure once its retries are exhausted.
+        
+        Args:
+            model: Model to call instead of self.model (e.g. the verifier model)
         
+        Returns:
+            Parsed JSON response
+        
+        Raises:
+            Exception: If all retries are exhausted or the circuit breaker is open
+        """
+        model = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = PromptCache.make_key(model, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving response from prompt cache")
+                return _loads(cached)
+        
+        try:
+            with self._breaker.calling():
+                json_response = await self._complete_json_with_retries(
+                    prompt, result_key, model, max_retries, initial_delay, cap_delay
+                )
+        except pybreaker.CircuitBreakerError as e:
+            logger.error("Non-retryable error: %s", e)
+            raise Exception(f"Error code: 503 - {str(e)}") from e
+        
+        # An empty answer is returned but not cached, so it isn't replayed for the whole TTL
+        if cache_key is not None and json_response[result_key]:
+            self.cache.set(cache_key, _dumps(json_response).decode())
+        return json_response
+    
+    async def _complete_json_with_retries(self, prompt, result_key, model, max_retries=5, initial_delay=2, cap_delay=60):
+        """
+        Send a prompt in JSON mode, retrying transient errors with backoff.
+        
+        A response that is not a JSON object containing result_key is retried
+        like a malformed body.
+        
+        Returns:
+            Parsed JSON response
+        
+        Raises:
+            Exception: If all retries are exhausted
+        """
         last_exception = None
         
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model="gemini-2.5-flash",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                )
+                async with self._rpm:
+                    response = await self.client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        response_format={"type": "json_object"}
+                    )
+                
+                # Parse inside the retry loop so a malformed body is re-requested
+                json_response = _loads(response.choices[0].message.content)
+                if not isinstance(json_response, dict) or result_key not in json_response:
+                    raise MalformedResponseError(f"Response has no {result_key!r} key")
                 
                 # Success - break out of retry loop
                 break
                 
             except Exception as e:
                 last_exception = e
-                error_str = str(e).lower()
-                
-                # Try to extract status code from various exception attributes
-                error_code = None
-                if hasattr(e, 'status_code'):
-                    error_code = e.status_code
-                elif hasattr(e, 'response') and hasattr(e.response, 'status_code'):
-                    error_code = e.response.status_code
-                elif hasattr(e, 'code'):
-                    error_code = e.code
-                
-                # Check if it's a 503 or overload error
-                is_503_error = (
-                    error_code == 503 or
-                    '503' in str(e) or
-                    'overloaded' in error_str or
-                    'unavailable' in error_str or
-                    'service unavailable' in error_str or
-                    'model is overloaded' in error_str
-                )
-                
-                # Check if it's a rate limit error (429)
-                try:
-                    is_rate_limit_type = isinstance(e, RateLimitError)
-                except (NameError, TypeError):
-                    is_rate_limit_type = False
-                
-                is_rate_limit = (
-                    error_code == 429 or
-                    is_rate_limit_type or
-                    'rate limit' in error_str or
-                    'too many requests' in error_str
-                )
-                
-                # Check if it's a connection error
-                try:
-                    is_connection_error_type = isinstance(e, APIConnectionError)
-                except (NameError, TypeError):
-                    is_connection_error_type = False
-                
-                is_connection_error = (
-                    is_connection_error_type or
-                    'connection' in error_str or
-                    'timeout' in error_str or
-                    'network' in error_str
-                )
-                
-                # Only retry on 503, 429, or connection errors
-                if not (is_503_error or is_rate_limit or is_connection_error):
-                    # Don't retry on other errors
-                    logger.error(f"Non-retryable error: {e}")
-                    raise Exception(f"Error code: {error_code or 'UNKNOWN'} - {str(e)}")
-                
-                # If this is the last attempt, raise the exception
-                if attempt == max_retries - 1:
-                    logger.error(f"All {max_retries} retry attempts exhausted. Last error: {e}")
-                    raise Exception(
-                        f"Error code: {error_code or 'UNKNOWN'} - {str(e)}"
-                    )
-                
-                # Calculate exponential backoff delay
-                delay = initial_delay * (2 ** attempt)
-                # Cap the delay at 60 seconds
-                delay = min(delay, 60)
-                
-                logger.warning(
-                    f"API error (attempt {attempt + 1}/{max_retries}): {e}. "
-                    f"Retrying in {delay} seconds..."
-                )
-                time.sleep(delay)
+                retryable, error_code = classify(e)
+                if not retryable:
+                    if error_code is None:
+                        # Not an API failure: let it propagate unchanged
+                        raise
+                    # Client errors (4xx)
+                    logger.error("Non-retryable error: %s", e)
+                    raise Exception(f"Error code: {error_code} - {str(e)}") from e
+            
+            # If this is the last attempt, raise the exception
+            if attempt == max_retries - 1:
+                logger.error("All %d retry attempts exhausted. Last error: %s", max_retries, last_exception)
+                raise Exception(
+                    f"Error code: {error_code or 'UNKNOWN'} - {str(last_exception)}"
+                ) from last_exception
+            
+            # Exponential backoff with full jitter so concurrent shards don't retry in lockstep
+            delay = random.uniform(0, min(cap_delay, initial_delay * (2 ** attempt)))
+            # Never retry sooner than the server's Retry-After
+            server_delay = retry_after(last_exception)
+            if server_delay is not None:
+                delay = min(max(server_delay, delay), cap_delay)
+            
+            logger.warning(
+                "API error (attempt %d/%d): %s. Retrying in %.2f seconds...",
+                attempt + 1, max_retries, last_exception, delay
+            )
+            await asyncio.sleep(delay)
         
-        # If we get here, we have a successful response
-        if 'response' not in locals():
+        # If we get here, we have a successful, parsed response
+        if 'json_response' not in locals():
             # This shouldn't happen, but just in case
             raise Exception(f"Failed to get response after {max_retries} attempts")
         
-        response_text = response.choices[0].message.content
-        
-        # Clean up the response if it contains markdown code blocks
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        # Parse the JSON response
-        try:
-            json_response = json.loads(response_text)
-            return json_response
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON: {e}")
-            print(f"Raw response: {response_text}")
-            return {"error": "Failed to parse response", "raw_response": response_text}
+        return json_response
+
+@lru_cache(maxsize=1)
+def get_client() -> GeminiClient:
+    """
+    Get or create the process-wide GeminiClient.
+    
+    Sharing one instance reuses its HTTP/2 connection pool, rate limiter and
+    prompt cache across every caller in the process.
+    """
+    return GeminiClient()
+
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate company leads with Gemini")
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print the full JSON result in addition to saving it"
+    )
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=os.getenv("LOGLEVEL", "INFO").upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     # Input parameters
     industry = "health insurance"
     output_number = 10
     country = "USA"
     use_web_scraper = True  # Set to True to enable web scraping
+    use_verifier = False  # Set to True to fill missing fields with the verifier model
+    
+    async def generate():
+        async with GeminiClient(cache_enabled=True) as client:
+            if not use_web_scraper:
+                result = await client.agenerate_companies(industry, output_number, country)
+            else:
+                # Scrape each company as soon as it is streamed back, overlapping
+                # generation with the web scraping
+                print("\n" + "="*50)
+                print("GENERATING AND ENHANCING DATA WITH WEB SCRAPING")
+                print("="*50)
+                
+                async with httpx.AsyncClient(timeout=10.0, http2=True) as http_client:
+                    companies = await scrape_companies_async(
+                        client.astream_companies(industry, output_number, country),
+                        http_client,
+                        max_concurrency=10
+                    )
+                result = {"companies": companies}
+            
+            if use_verifier:
+                result = await client.averify_companies(result, industry, country)
+            return result
     
-    client = GeminiClient()
-    result = client.generate_companies(industry, output_number, country)
+    result = asyncio.run(generate())
     
-    # Optionally enhance with web scraping
-    if use_web_scraper:
+    output = _dumps(result, indent=True)
+    
+    # Pretty print the JSON output only on request
+    if args.verbose:
         print("\n" + "="*50)
-        print("ENHANCING DATA WITH WEB SCRAPING")
+        print("FINAL RESULTS")
         print("="*50)
-        
-        from web_scraper import scrape_company_data
-        result = scrape_company_data(result)
-    
-    # Pretty print the JSON output
-    print("\n" + "="*50)
-    print("FINAL RESULTS")
-    print("="*50)
-    print(json.dumps(result, indent=2))
+        print(output.decode())
     
-    # Optionally, save to a file
-    with open('leads.json', 'w') as f:
-        json.dump(result, f, indent=2)
-    print("\nResults saved to leads.json")
+    # Save to a file (single write to a temp file, then an atomic rename)
+    tmp_path = 'leads.json.tmp'
+    with open(tmp_path, 'wb', buffering=0) as f:
+        f.write(output)
+    os.replace(tmp_path, 'leads.json')
+    print(f"\nGenerated {len(result.get('companies', []))} companies → leads.json")
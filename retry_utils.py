@@ -0,0 +1,58 @@
+"""
+Retry Utilities
+Shared classification of Gemini (OpenAI-compatible) API errors for retry logic.
+"""
+
+import json
+from typing import Optional, Tuple
+
+import pybreaker
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+# HTTP statuses worth retrying (timeouts, rate limits and transient server errors)
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class MalformedResponseError(ValueError):
+    """A response that parsed as JSON but does not have the requested structure"""
+
+
+def classify(exc: BaseException) -> Tuple[bool, Optional[int]]:
+    """
+    Classify an API error for retry handling.
+
+    Args:
+        exc: Exception raised while calling the API or parsing its response
+
+    Returns:
+        (retryable, status_code) - status_code is None when the error has no
+        HTTP status (network failures, timeouts, invalid or malformed JSON,
+        unknown errors)
+    """
+    if isinstance(exc, RateLimitError):
+        return True, exc.status_code
+    if isinstance(exc, (APIConnectionError, APITimeoutError)):
+        return True, None
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES, exc.status_code
+    if isinstance(exc, (json.JSONDecodeError, MalformedResponseError)):
+        return True, None
+    if isinstance(exc, pybreaker.CircuitBreakerError):
+        # Open circuit: the service is unavailable, and retrying right away won't help
+        return False, 503
+    return False, None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """
+    Seconds requested by the Retry-After header of a failed response, if any.
+
+    Only the delay-seconds form is supported; HTTP-date values return None.
+    """
+    response = getattr(exc, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
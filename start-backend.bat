@@ -28,5 +28,7 @@ echo.
 echo Press Ctrl+C to stop the server
 echo.
 
+REM Auto-reload on code changes
+set DEV=1
 python api.py
 
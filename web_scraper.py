@@ -1,12 +1,19 @@
 # To run this code you need to install the following dependencies:
-# pip install beautifulsoup4 requests
+# pip install beautifulsoup4 requests httpx
 
 import re
+import asyncio
+import contextlib
+import logging
+import anyio
+import httpx
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
-from typing import Dict, List, Set, Optional
+from typing import AsyncIterable, Dict, Iterable, List, Set, Optional, Union
+
+logger = logging.getLogger(__name__)
 
 class WebScraper:
     def __init__(self):
@@ -116,27 +123,30 @@ class WebScraper:
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract emails from page text and HTML
-            page_text = soup.get_text()
-            emails = self.extract_emails(page_text)
-            
-            # Also check mailto links
-            mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.IGNORECASE))
-            for mailto in mailto_links:
-                email_match = re.search(r'mailto:([^\?\"\'>\s]+)', mailto['href'], re.IGNORECASE)
-                if email_match:
-                    emails.add(email_match.group(1))
-            
-            # Extract social media
-            social_media = self.extract_social_media(soup, url)
-            
-            return emails, social_media
+            return self.parse_page(soup, url)
             
         except requests.exceptions.RequestException as e:
-            print(f"Error scraping {url}: {str(e)}")
+            logger.warning("Error scraping %s: %s", url, e)
             return emails, social_media
     
+    def parse_page(self, soup: BeautifulSoup, url: str) -> tuple[Set[str], Dict[str, Optional[str]]]:
+        """Extract emails and social media from a parsed page"""
+        # Extract emails from page text and HTML
+        page_text = soup.get_text()
+        emails = self.extract_emails(page_text)
+        
+        # Also check mailto links
+        mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.IGNORECASE))
+        for mailto in mailto_links:
+            email_match = re.search(r'mailto:([^\?\"\'>\s]+)', mailto['href'], re.IGNORECASE)
+            if email_match:
+                emails.add(email_match.group(1))
+        
+        # Extract social media
+        social_media = self.extract_social_media(soup, url)
+        
+        return emails, social_media
+    
     def scrape_website(self, base_url: str) -> Dict:
         """Scrape the entire website for contact info and social media"""
         print(f"\nScraping: {base_url}")
@@ -187,38 +197,155 @@ class WebScraper:
                 
                 print(f"  - Scraped {contact_url}: {len(emails)} emails found")
             
-            # Convert emails set to list and get the most likely contact email
-            email_list = list(all_emails)
-            primary_email = None
-            
-            if email_list:
-                # Prioritize emails with contact, info, sales, support keywords
-                priority_keywords = ['contact', 'info', 'hello', 'support', 'sales', 'business']
-                for email in email_list:
-                    if any(keyword in email.lower() for keyword in priority_keywords):
-                        primary_email = email
-                        break
-                
-                # If no priority email found, just use the first one
-                if not primary_email:
-                    primary_email = email_list[0]
-            
             print(f"  - Total emails found: {len(all_emails)}")
             print(f"  - Social media accounts found: {sum(1 for v in final_social_media.values() if v)}")
             
-            return {
-                'contact_email': primary_email,
-                'all_emails': email_list,
-                'social_media': final_social_media
-            }
+            return self.build_result(all_emails, final_social_media)
             
         except Exception as e:
-            print(f"  - Error: {str(e)}")
+            logger.warning("Error scraping %s: %s", base_url, e)
             return {
                 'contact_email': None,
                 'all_emails': [],
                 'social_media': final_social_media
             }
+    
+    def build_result(self, all_emails: Set[str], social_media: Dict[str, Optional[str]]) -> Dict:
+        """Pick the most likely contact email and package the scrape result"""
+        # Convert emails set to list and get the most likely contact email
+        email_list = list(all_emails)
+        primary_email = None
+        
+        if email_list:
+            # Prioritize emails with contact, info, sales, support keywords
+            priority_keywords = ['contact', 'info', 'hello', 'support', 'sales', 'business']
+            for email in email_list:
+                if any(keyword in email.lower() for keyword in priority_keywords):
+                    primary_email = email
+                    break
+            
+            # If no priority email found, just use the first one
+            if not primary_email:
+                primary_email = email_list[0]
+        
+        return {
+            'contact_email': primary_email,
+            'all_emails': email_list,
+            'social_media': social_media
+        }
+    
+    async def fetch_page(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Optional[httpx.Response]:
+        """Fetch a page with a shared async client (None on failure)"""
+        try:
+            async with semaphore or contextlib.nullcontext():
+                response = await client.get(url, headers=self.headers, follow_redirects=True)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            logger.warning("Error scraping %s: %s", url, e)
+            return None
+    
+    def analyze_page(
+        self,
+        response: httpx.Response,
+        url: str,
+        find_contacts: bool = False
+    ) -> tuple[Set[str], Dict[str, Optional[str]], List[str]]:
+        """
+        Decode and parse a fetched page, returning its emails, social media and
+        (optionally) contact page URLs. CPU-bound: the async scraper runs it in a
+        worker thread so parsing never blocks the event loop.
+        """
+        soup = BeautifulSoup(response.text, 'html.parser')
+        emails, social_media = self.parse_page(soup, url)
+        contact_urls = self.find_contact_page_urls(soup, url) if find_contacts else []
+        return emails, social_media, contact_urls
+    
+    async def scrape_website_async(
+        self,
+        base_url: str,
+        client: httpx.AsyncClient,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Dict:
+        """
+        Async version of scrape_website; the homepage is fetched once and reused.
+        If given, the semaphore caps in-flight requests shared with other scrapes.
+        """
+        all_emails = set()
+        final_social_media = {
+            'linkedin': None,
+            'twitter': None,
+            'facebook': None,
+            'instagram': None,
+            'youtube': None
+        }
+        
+        def merge_page(emails, social_media):
+            all_emails.update(emails)
+            
+            # Update social media (keep first found)
+            for platform, link in social_media.items():
+                if link and not final_social_media[platform]:
+                    final_social_media[platform] = link
+        
+        self.visited_urls = {base_url}
+        
+        response = await self.fetch_page(client, base_url, semaphore)
+        if response is None:
+            return self.build_result(all_emails, final_social_media)
+        
+        emails, social_media, contact_urls = await anyio.to_thread.run_sync(
+            self.analyze_page, response, base_url, True
+        )
+        merge_page(emails, social_media)
+        
+        for contact_url in contact_urls:
+            await asyncio.sleep(0.3)  # Still respectful to the target site
+            self.visited_urls.add(contact_url)
+            response = await self.fetch_page(client, contact_url, semaphore)
+            if response is not None:
+                emails, social_media, _ = await anyio.to_thread.run_sync(
+                    self.analyze_page, response, contact_url
+                )
+                merge_page(emails, social_media)
+        
+        return self.build_result(all_emails, final_social_media)
+
+
+def merge_scraped_data(company: Dict, scraped_data: Dict) -> Dict:
+    """Merge scraped contact data into an LLM-generated company record"""
+    # Store LLM email as separate field before overwriting
+    if company.get('contact_email'):
+        company['contact_email_llm'] = company['contact_email']
+    
+    # Update contact email with scraped data (prioritize scraped as it's real-time)
+    if scraped_data['contact_email']:
+        company['contact_email'] = scraped_data['contact_email']
+    
+    # Store all emails found
+    company['additional_emails'] = scraped_data['all_emails']
+    
+    # Keep LLM social media in original field
+    # Add scraped social media as verified/real-time data
+    if scraped_data['social_media']:
+        company['social_media_scraped'] = {}
+        for platform, url in scraped_data['social_media'].items():
+            if url:
+                company['social_media_scraped'][platform] = url
+    
+    # Also fill in missing LLM social media with scraped data
+    for platform, url in scraped_data['social_media'].items():
+        if url and (not company.get('social_media', {}).get(platform)):
+            if 'social_media' not in company:
+                company['social_media'] = {}
+            company['social_media'][platform] = url
+    
+    return company
 
 def scrape_company_data(company_data: Dict) -> Dict:
     """Enhance company data with scraped information"""
@@ -229,32 +356,7 @@ def scrape_company_data(company_data: Dict) -> Dict:
         
         if website_url:
             scraped_data = scraper.scrape_website(website_url)
-            
-            # Store LLM email as separate field before overwriting
-            if company.get('contact_email'):
-                company['contact_email_llm'] = company['contact_email']
-            
-            # Update contact email with scraped data (prioritize scraped as it's real-time)
-            if scraped_data['contact_email']:
-                company['contact_email'] = scraped_data['contact_email']
-            
-            # Store all emails found
-            company['additional_emails'] = scraped_data['all_emails']
-            
-            # Keep LLM social media in original field
-            # Add scraped social media as verified/real-time data
-            if scraped_data['social_media']:
-                company['social_media_scraped'] = {}
-                for platform, url in scraped_data['social_media'].items():
-                    if url:
-                        company['social_media_scraped'][platform] = url
-            
-            # Also fill in missing LLM social media with scraped data
-            for platform, url in scraped_data['social_media'].items():
-                if url and (not company.get('social_media', {}).get(platform)):
-                    if 'social_media' not in company:
-                        company['social_media'] = {}
-                    company['social_media'][platform] = url
+            merge_scraped_data(company, scraped_data)
             
             # Small delay between companies (reduced for speed)
             time.sleep(0.5)
@@ -288,36 +390,9 @@ def scrape_company_data_parallel(company_data: Dict, max_workers: int = 3) -> Di
         
         try:
             scraped_data = scraper.scrape_website(website_url)
-            
-            # Store LLM email as separate field before overwriting
-            if company.get('contact_email'):
-                company['contact_email_llm'] = company['contact_email']
-            
-            # Update contact email with scraped data (prioritize scraped as it's real-time)
-            if scraped_data['contact_email']:
-                company['contact_email'] = scraped_data['contact_email']
-            
-            # Store all emails found
-            company['additional_emails'] = scraped_data['all_emails']
-            
-            # Keep LLM social media in original field
-            # Add scraped social media as verified/real-time data
-            if scraped_data['social_media']:
-                company['social_media_scraped'] = {}
-                for platform, url in scraped_data['social_media'].items():
-                    if url:
-                        company['social_media_scraped'][platform] = url
-            
-            # Also fill in missing LLM social media with scraped data
-            for platform, url in scraped_data['social_media'].items():
-                if url and (not company.get('social_media', {}).get(platform)):
-                    if 'social_media' not in company:
-                        company['social_media'] = {}
-                    company['social_media'][platform] = url
-            
-            return company
+            return merge_scraped_data(company, scraped_data)
         except Exception as e:
-            logger.warning(f"Error scraping {website_url}: {str(e)}")
+            logger.warning("Error scraping %s: %s", website_url, e)
             return company
     
     # Use ThreadPoolExecutor for parallel scraping
@@ -326,6 +401,95 @@ def scrape_company_data_parallel(company_data: Dict, max_workers: int = 3) -> Di
     
     return {'companies': results}
 
+
+async def scrape_company_async(
+    company: Dict,
+    client: httpx.AsyncClient,
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> Dict:
+    """
+    Scrape a single company's website and merge the results into its record.
+    
+    Args:
+        company: Company dictionary (needs 'website_url' to be scraped)
+        client: Shared httpx.AsyncClient
+        semaphore: Optional semaphore capping in-flight page requests
+    
+    Returns:
+        The company dictionary, enhanced when scraping succeeded
+    """
+    website_url = company.get('website_url')
+    if not website_url:
+        return company
+    
+    try:
+        # Separate scraper per company: visited_urls is per-site state
+        scraped_data = await WebScraper().scrape_website_async(website_url, client, semaphore)
+        return merge_scraped_data(company, scraped_data)
+    except Exception as e:
+        logger.warning("Error scraping %s: %s", website_url, e)
+        return company
+
+
+async def scrape_companies_async(
+    companies: Union[Iterable[Dict], AsyncIterable[Dict]],
+    client: httpx.AsyncClient,
+    max_concurrency: int = 16
+) -> List[Dict]:
+    """
+    Scrape companies concurrently, starting each one as soon as it is available.
+    
+    Args:
+        companies: List of company dictionaries, or an async iterator yielding them
+            (e.g. GeminiClient.astream_companies) so scraping overlaps generation
+        client: Shared httpx.AsyncClient (connection pool reused across companies)
+        max_concurrency: Maximum in-flight page requests (default: 16)
+    
+    Returns:
+        Enhanced companies, in input order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    if hasattr(companies, '__aiter__'):
+        tasks = []
+        try:
+            async for company in companies:
+                tasks.append(asyncio.create_task(scrape_company_async(company, client, semaphore)))
+        except BaseException:
+            # The source failed (or we were cancelled) midway: don't leave scrapes running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    else:
+        tasks = [scrape_company_async(company, client, semaphore) for company in companies]
+    
+    return list(await asyncio.gather(*tasks))
+
+
+async def scrape_company_data_async(
+    company_data: Dict,
+    client: httpx.AsyncClient,
+    max_concurrency: int = 16
+) -> Dict:
+    """
+    Async version of scrape_company_data for the API server.
+    
+    Args:
+        company_data: Dictionary with companies list
+        client: Shared httpx.AsyncClient (connection pool reused across companies)
+        max_concurrency: Maximum in-flight page requests (default: 16)
+    
+    Returns:
+        Enhanced company data with scraped information
+    """
+    company_data['companies'] = await scrape_companies_async(
+        company_data.get('companies', []),
+        client,
+        max_concurrency
+    )
+    return company_data
+
 if __name__ == '__main__':
     # Example usage
     scraper = WebScraper()